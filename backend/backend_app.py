@@ -1,45 +1,346 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request
+from flask.json.provider import DefaultJSONProvider
+from flask_compress import Compress
 from flask_cors import CORS
 from flask_swagger_ui import get_swaggerui_blueprint
-from datetime import datetime
-import json
+from datetime import date, datetime
+import atexit
+import functools
+import itertools
+import orjson
 import os
+import re
+import stat
+import tempfile
+import threading
 
-app = Flask(__name__)
-CORS(app)
 
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    JSON provider that parses and serializes with orjson, so request
+    bodies read via request.get_json() are parsed by orjson as well.
+    """
 
-def read_posts():
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default).decode()
+
+
+app = Flask(__name__)
+app.json = OrjsonProvider(app)
+# Only the API needs CORS; browsers may cache preflight responses for a day.
+CORS(app, resources={r"/api/*": {"origins": "*", "max_age": 86400}})
+
+# Gzip/brotli-compress JSON responses large enough to benefit from it.
+app.config['COMPRESS_MIMETYPES'] = ['application/json']
+app.config['COMPRESS_LEVEL'] = 4
+app.config['COMPRESS_MIN_SIZE'] = 500
+# Streamed responses (search results) have no known length, so
+# COMPRESS_MIN_SIZE does not apply to them: they are always compressed
+# when the client accepts it. gzip is enabled for them too, as
+# flask-compress leaves it out of the streaming algorithms by default.
+app.config['COMPRESS_STREAMS'] = True
+app.config['COMPRESS_ALGORITHM_STREAMING'] = ['zstd', 'br', 'gzip', 'deflate']
+Compress(app)
+
+POSTS_FILE = 'posts.json'
+# Seconds to wait after a change before the posts are flushed to disk,
+# so a burst of writes results in a single file write.
+WRITE_DELAY = 1.0
+# Post fields that must be strings when sent in a request.
+STRING_POST_FIELDS = ('title', 'content', 'author', 'date')
+REQUIRED_POST_FIELDS = frozenset({'title', 'content', 'author', 'date'})
+DATE_PATTERN = re.compile(r'[0-9]{4}-[0-9]{2}-[0-9]{2}')
+
+_posts_lock = threading.RLock()
+# Serializes flushes, so an older snapshot never replaces a newer one on disk.
+_write_lock = threading.Lock()
+_write_timer = None
+_dirty = False
+# Bumped on every change to the posts; used to key cached listings.
+_version = 0
+# Sorted lists of the posts by (sort, direction), shared by all pages.
+_sorted_views = {}
+
+# The process umask; os.umask can only be read by setting it.
+_umask = os.umask(0)
+os.umask(_umask)
+
+
+def load_posts():
     """
-    Read posts from the JSON file.
+    Load posts from the JSON file.
     """
-    if not os.path.exists('posts.json'):
+    if not os.path.exists(POSTS_FILE):
         return []
-    with open('posts.json', 'r') as file:
+    with open(POSTS_FILE, 'rb') as file:
         try:
-            return json.load(file)
-        except json.JSONDecodeError:
+            return orjson.loads(file.read())
+        except orjson.JSONDecodeError:
             return []
 
 
-def write_posts(posts):
+# The posts are kept in memory, keyed by ID; the JSON file is only read
+# once at startup. They are stored in ID order, and new posts get higher
+# IDs, so iteration order and ID order always agree.
+_posts_by_id = {post['id']: post for post in sorted(load_posts(), key=lambda post: post['id'])}
+# The ID for the next new post; only ever increases, so IDs of deleted
+# posts are not handed out again.
+_next_id = max(_posts_by_id, default=0) + 1
+# Precomputed comparison keys per post ID, used for sorting and search:
+# the lowercased title, content and author, and the date as an ordinal.
+_post_keys = {}
+# Inverted indexes for substring search: for each text field, a mapping
+# of every lowercased trigram to the IDs of the posts that contain it.
+TRIGRAM_FIELDS = ('title', 'content', 'author')
+_trigram_index = {field: {} for field in TRIGRAM_FIELDS}
+
+
+def trigrams(text):
+    """
+    Return the set of three-character substrings of a text.
+    """
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def invalid_fields(data):
+    """
+    Return the names of the given post fields that are not strings.
+    """
+    return [field for field in STRING_POST_FIELDS
+            if field in data and not isinstance(data[field], str)]
+
+
+def text_key(value):
+    """
+    Return the lowercased form of a text field, for comparisons.
+    Posts loaded from posts.json are not validated, so a non-string
+    value is tolerated and compares as an empty string.
+    """
+    return value.lower() if isinstance(value, str) else ''
+
+
+def parse_date(value):
+    """
+    Parse a YYYY-MM-DD date string.
+    Returns the date, or None if the string is not a valid date.
+    """
+    if not DATE_PATTERN.fullmatch(value):
+        return None
+    try:
+        return date(int(value[:4]), int(value[5:7]), int(value[8:10]))
+    except ValueError:
+        return None
+
+
+def date_key(value):
+    """
+    Return the ordinal of a post's date, for sorting.
+    Posts in posts.json may predate the strict date check, so unpadded
+    dates such as 2024-7-22 fall back to strptime, and dates that do not
+    parse at all are tolerated and sort first.
+    """
+    if isinstance(value, str):
+        parsed = parse_date(value)
+        if parsed is not None:
+            return parsed.toordinal()
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').toordinal()
+    except (TypeError, ValueError):
+        return 0
+
+
+def build_post_keys(post):
+    """
+    Compute the lookup data of a post.
+    Done before a post is stored or changed, so a post is never left
+    in the store without its lookup data.
+    """
+    return {
+        'title': text_key(post.get('title')),
+        'content': text_key(post.get('content')),
+        'author': text_key(post.get('author')),
+        'date': date_key(post.get('date'))
+    }
+
+
+def index_post(post, keys):
+    """
+    Update the derived lookup data for a post after it was added or changed.
+    """
+    post_id = post['id']
+    unindex_post(post_id)
+    _post_keys[post_id] = keys
+    for field in TRIGRAM_FIELDS:
+        index = _trigram_index[field]
+        for trigram in trigrams(keys[field]):
+            index.setdefault(trigram, set()).add(post_id)
+
+
+def unindex_post(post_id):
+    """
+    Remove the derived lookup data for a deleted post.
+    """
+    keys = _post_keys.pop(post_id, None)
+    if keys is None:
+        return
+    for field in TRIGRAM_FIELDS:
+        index = _trigram_index[field]
+        for trigram in trigrams(keys[field]):
+            post_ids = index[trigram]
+            post_ids.discard(post_id)
+            if not post_ids:
+                del index[trigram]
+
+
+def find_candidates(field, query):
+    """
+    Return the IDs of the posts whose field contains every trigram of the
+    (lowercased) query. Matches still have to be verified with a substring
+    check, as the trigrams may occur at different positions.
+    """
+    index = _trigram_index[field]
+    post_id_sets = []
+    for trigram in trigrams(query):
+        post_ids = index.get(trigram)
+        if not post_ids:
+            return set()
+        post_id_sets.append(post_ids)
+    post_id_sets.sort(key=len)
+    return post_id_sets[0].intersection(*post_id_sets[1:])
+
+
+for _post in _posts_by_id.values():
+    index_post(_post, build_post_keys(_post))
+
+
+def read_posts():
+    """
+    Return the in-memory posts, in ID order.
+    """
+    return _posts_by_id.values()
+
+
+def posts_file_mode():
     """
-    Write posts to the JSON file.
+    Return the permission bits for the posts file: those of the existing
+    file, or what open() would use for a new one (0666 minus the umask).
     """
-    with open('posts.json', 'w') as file:
-        json.dump(posts, file, indent=4)
+    try:
+        return stat.S_IMODE(os.stat(POSTS_FILE).st_mode)
+    except FileNotFoundError:
+        return 0o666 & ~_umask
+
+
+def write_posts(data):
+    """
+    Write serialized posts to the JSON file.
+    The data is written to a temporary file first and then swapped in,
+    so a crash mid-write never leaves a truncated posts file behind.
+    """
+    directory = os.path.dirname(os.path.abspath(POSTS_FILE))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            file.write(data)
+        # mkstemp creates the file as 0600; keep the usual permissions.
+        os.chmod(tmp_path, posts_file_mode())
+        os.replace(tmp_path, POSTS_FILE)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def schedule_flush():
+    """
+    Start the timer for a deferred write to disk, unless one is pending.
+    Must be called with _posts_lock held.
+    """
+    global _write_timer
+    if _write_timer is None:
+        _write_timer = threading.Timer(WRITE_DELAY, flush_posts)
+        _write_timer.daemon = True
+        _write_timer.start()
+
+
+def flush_posts():
+    """
+    Write the in-memory posts to disk if they changed since the last write.
+    Only the serialization happens under _posts_lock; the file is written
+    after releasing it. If the write fails, another one is scheduled.
+    """
+    global _dirty, _write_timer
+    with _write_lock:
+        with _posts_lock:
+            _write_timer = None
+            if not _dirty:
+                return
+            data = orjson.dumps(list(read_posts()), option=orjson.OPT_INDENT_2)
+            _dirty = False
+
+        try:
+            write_posts(data)
+        except BaseException:
+            with _posts_lock:
+                _dirty = True
+                schedule_flush()
+            raise
+
+
+def mark_dirty():
+    """
+    Flag the posts as changed, drop cached listings and schedule
+    a deferred write to disk.
+    Must be called with _posts_lock held.
+    """
+    global _dirty, _version
+    _dirty = True
+    _version += 1
+    _sorted_views.clear()
+    render_posts.cache_clear()
+    schedule_flush()
+
+
+atexit.register(flush_posts)
+
+
+def json_response(obj, status=200):
+    """
+    Build a JSON response, serialized with orjson.
+    """
+    return Response(orjson.dumps(obj), status=status, mimetype='application/json')
+
+
+def stream_json_list(items):
+    """
+    Build a JSON array response from already serialized items, sent item
+    by item instead of being joined into one large body first.
+    Items should be serialized while the data they come from is locked,
+    as the response is generated after the view has returned.
+    """
+    def generate():
+        yield b'['
+        first = True
+        for item in items:
+            yield item if first else b',' + item
+            first = False
+        yield b']'
+
+    return Response(generate(), mimetype='application/json')
 
 
 def generate_id():
     """
     Generate a unique ID for a new blog post.
-    The ID is the increment of the last post's ID, or 1 if the list is empty.
+    IDs are handed out from a counter that starts after the highest
+    existing ID. Must be called with _posts_lock held.
     """
-    posts = read_posts()
-    if posts:
-        return posts[-1]['id'] + 1
-    else:
-        return 1
+    global _next_id
+    post_id = _next_id
+    _next_id += 1
+    return post_id
 
 
 @app.route('/')
@@ -57,29 +358,67 @@ def add_post():
     API endpoint to add a new blog post.
     """
     data = request.get_json()
-    if not data or 'title' not in data or 'content' not in data or 'author' not in data or 'date' not in data:
-        missing_fields = [field for field in ['title', 'content', 'author', 'date'] if field not in data]
-        return jsonify({'error': f'Missing fields: {", ".join(missing_fields)}'}), 400
+    if not isinstance(data, dict):
+        return json_response({'error': 'Request body must be a JSON object.'}, 400)
+
+    missing_fields = REQUIRED_POST_FIELDS.difference(data)
+    if missing_fields:
+        return json_response({'error': f'Missing fields: {", ".join(sorted(missing_fields))}'}, 400)
+
+    wrong_types = invalid_fields(data)
+    if wrong_types:
+        return json_response({'error': f'Fields must be strings: {", ".join(wrong_types)}'}, 400)
+
+    if parse_date(data['date']) is None:
+        return json_response({'error': 'Invalid date format. Use YYYY-MM-DD.'}, 400)
+
+    with _posts_lock:
+        new_post = {
+            'id': generate_id(),
+            'title': data['title'],
+            'content': data['content'],
+            'author': data['author'],
+            'date': data['date'],
+            'categories': data.get('categories', []),
+            'tags': data.get('tags', []),
+            'comments': []
+        }
+        keys = build_post_keys(new_post)
+        _posts_by_id[new_post['id']] = new_post
+        index_post(new_post, keys)
+        mark_dirty()
+    return json_response(new_post, 201)
+
+
+def sorted_posts(sort, direction):
+    """
+    Return the posts sorted by a field. The sorted list is kept until
+    the posts change, so paging through a sorted listing sorts only once.
+    Must be called with _posts_lock held.
+    """
+    posts = _sorted_views.get((sort, direction))
+    if posts is None:
+        reverse = (direction == 'desc')
+        posts = sorted(read_posts(), key=lambda x: _post_keys[x['id']][sort], reverse=reverse)
+        _sorted_views[(sort, direction)] = posts
+    return posts
 
-    try:
-        datetime.strptime(data['date'], '%Y-%m-%d')
-    except ValueError:
-        return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD.'}), 400
-
-    posts = read_posts()
-    new_post = {
-        'id': generate_id(),
-        'title': data['title'],
-        'content': data['content'],
-        'author': data['author'],
-        'date': data['date'],
-        'categories': data.get('categories', []),
-        'tags': data.get('tags', []),
-        'comments': []
-    }
-    posts.append(new_post)
-    write_posts(posts)
-    return jsonify(new_post), 201
+
+@functools.lru_cache(maxsize=128)
+def render_posts(version, sort, direction, page, limit):
+    """
+    Sort and paginate the posts and return the serialized JSON.
+    Results are cached per version of the posts, so repeated queries
+    skip both the sort and the serialization.
+    """
+    start = (page - 1) * limit
+    end = start + limit
+
+    with _posts_lock:
+        posts = sorted_posts(sort, direction) if sort else read_posts()
+        paginated_posts = list(itertools.islice(posts, start, end))
+
+    return orjson.dumps(paginated_posts)
 
 
 @app.route('/api/posts', methods=['GET'])
@@ -96,25 +435,16 @@ def get_posts():
     valid_directions = {'asc', 'desc'}
 
     if sort and sort not in valid_sort_fields:
-        return jsonify({'error': 'Invalid sort field. Valid fields are title, content, author, date.'}), 400
+        return json_response({'error': 'Invalid sort field. Valid fields are title, content, author, date.'}, 400)
 
     if direction not in valid_directions:
-        return jsonify({'error': 'Invalid sort direction. Valid directions are asc or desc.'}), 400
+        return json_response({'error': 'Invalid sort direction. Valid directions are asc or desc.'}, 400)
 
-    posts = read_posts()
+    if page < 1 or limit < 1:
+        return json_response({'error': 'Page and limit must be positive integers.'}, 400)
 
-    if sort:
-        reverse = (direction == 'desc')
-        if sort == 'date':
-            posts = sorted(posts, key=lambda x: datetime.strptime(x['date'], '%Y-%m-%d'), reverse=reverse)
-        else:
-            posts = sorted(posts, key=lambda x: x[sort].lower(), reverse=reverse)
-
-    start = (page - 1) * limit
-    end = start + limit
-    paginated_posts = posts[start:end]
-
-    return jsonify(paginated_posts)
+    body = render_posts(_version, sort, direction, page, limit)
+    return Response(body, mimetype='application/json')
 
 
 @app.route('/api/posts/<int:id>', methods=['DELETE'])
@@ -122,14 +452,14 @@ def delete_post(id):
     """
     API endpoint to delete a blog post by its ID.
     """
-    posts = read_posts()
-    post_to_delete = next((post for post in posts if post['id'] == id), None)
-    if post_to_delete is None:
-        return jsonify({'error': 'Post not found'}), 404
+    with _posts_lock:
+        post_to_delete = _posts_by_id.pop(id, None)
+        if post_to_delete is None:
+            return json_response({'error': 'Post not found'}, 404)
 
-    posts.remove(post_to_delete)
-    write_posts(posts)
-    return jsonify({'message': f'Post with id {id} has been deleted successfully.'}), 200
+        unindex_post(id)
+        mark_dirty()
+    return json_response({'message': f'Post with id {id} has been deleted successfully.'}, 200)
 
 
 @app.route('/api/posts/<int:id>', methods=['PUT'])
@@ -138,30 +468,38 @@ def update_post(id):
     API endpoint to update a blog post by its ID.
     """
     data = request.get_json()
-    posts = read_posts()
-    post_to_update = next((post for post in posts if post['id'] == id), None)
-    if post_to_update is None:
-        return jsonify({'error': 'Post not found'}), 404
-
-    if 'title' in data:
-        post_to_update['title'] = data['title']
-    if 'content' in data:
-        post_to_update['content'] = data['content']
-    if 'author' in data:
-        post_to_update['author'] = data['author']
-    if 'date' in data:
-        try:
-            datetime.strptime(data['date'], '%Y-%m-%d')
+    if not isinstance(data, dict):
+        return json_response({'error': 'Request body must be a JSON object.'}, 400)
+
+    wrong_types = invalid_fields(data)
+    if wrong_types:
+        return json_response({'error': f'Fields must be strings: {", ".join(wrong_types)}'}, 400)
+
+    if 'date' in data and parse_date(data['date']) is None:
+        return json_response({'error': 'Invalid date format. Use YYYY-MM-DD.'}, 400)
+
+    with _posts_lock:
+        post_to_update = _posts_by_id.get(id)
+        if post_to_update is None:
+            return json_response({'error': 'Post not found'}, 404)
+
+        keys = build_post_keys({**post_to_update, **data})
+        if 'title' in data:
+            post_to_update['title'] = data['title']
+        if 'content' in data:
+            post_to_update['content'] = data['content']
+        if 'author' in data:
+            post_to_update['author'] = data['author']
+        if 'date' in data:
             post_to_update['date'] = data['date']
-        except ValueError:
-            return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD.'}), 400
-    if 'categories' in data:
-        post_to_update['categories'] = data['categories']
-    if 'tags' in data:
-        post_to_update['tags'] = data['tags']
+        if 'categories' in data:
+            post_to_update['categories'] = data['categories']
+        if 'tags' in data:
+            post_to_update['tags'] = data['tags']
 
-    write_posts(posts)
-    return jsonify(post_to_update), 200
+        index_post(post_to_update, keys)
+        mark_dirty()
+    return json_response(post_to_update, 200)
 
 
 @app.route('/api/posts/search', methods=['GET'])
@@ -174,16 +512,31 @@ def search_posts():
     author_query = request.args.get('author', '').lower()
     date_query = request.args.get('date', '')
 
-    posts = read_posts()
-    filtered_posts = [
-        post for post in posts
-        if (title_query in post['title'].lower() if title_query else True) and
-           (content_query in post['content'].lower() if content_query else True) and
-           (author_query in post['author'].lower() if author_query else True) and
-           (date_query == post['date'] if date_query else True)
-    ]
+    filtered_posts = []
+    with _posts_lock:
+        # Narrow the search down with the trigram index where the queries
+        # are long enough to have trigrams, then verify the candidates.
+        candidates = None
+        for field, query in (('title', title_query), ('content', content_query), ('author', author_query)):
+            if len(query) >= 3:
+                post_ids = find_candidates(field, query)
+                candidates = post_ids if candidates is None else candidates & post_ids
+
+        if candidates is None:
+            posts = read_posts()
+        else:
+            # Posts are stored in ID order, so this matches a full scan.
+            posts = [_posts_by_id[post_id] for post_id in sorted(candidates)]
+
+        for post in posts:
+            keys = _post_keys[post['id']]
+            if ((title_query in keys['title'] if title_query else True) and
+                    (content_query in keys['content'] if content_query else True) and
+                    (author_query in keys['author'] if author_query else True) and
+                    (date_query == post['date'] if date_query else True)):
+                filtered_posts.append(orjson.dumps(post))
 
-    return jsonify(filtered_posts)
+    return stream_json_list(filtered_posts)
 
 
 @app.route('/api/posts/<int:post_id>/comments', methods=['POST'])
@@ -193,20 +546,20 @@ def add_comment(post_id):
     """
     data = request.get_json()
     if not data or 'author' not in data or 'text' not in data:
-        return jsonify({'error': 'Missing fields: author, text'}), 400
+        return json_response({'error': 'Missing fields: author, text'}, 400)
 
-    posts = read_posts()
-    post = next((post for post in posts if post['id'] == post_id), None)
-    if post is None:
-        return jsonify({'error': 'Post not found'}), 404
+    with _posts_lock:
+        post = _posts_by_id.get(post_id)
+        if post is None:
+            return json_response({'error': 'Post not found'}, 404)
 
-    new_comment = {
-        'author': data['author'],
-        'text': data['text']
-    }
-    post['comments'].append(new_comment)
-    write_posts(posts)
-    return jsonify(post), 201
+        new_comment = {
+            'author': data['author'],
+            'text': data['text']
+        }
+        post['comments'].append(new_comment)
+        mark_dirty()
+    return json_response(post, 201)
 
 
 @app.route('/api/posts/<int:post_id>/comments', methods=['GET'])
@@ -214,12 +567,11 @@ def get_comments(post_id):
     """
     API endpoint to retrieve all comments for a blog post by its ID.
     """
-    posts = read_posts()
-    post = next((post for post in posts if post['id'] == post_id), None)
+    post = _posts_by_id.get(post_id)
     if post is None:
-        return jsonify({'error': 'Post not found'}), 404
+        return json_response({'error': 'Post not found'}, 404)
 
-    return jsonify(post['comments'])
+    return json_response(post['comments'])
 
 
 # Swagger configuration
@@ -233,5 +585,6 @@ swagger_ui_blueprint = get_swaggerui_blueprint(
 app.register_blueprint(swagger_ui_blueprint, url_prefix=SWAGGER_URL)
 
 if __name__ == '__main__':
-    # Run the Flask application on port 5002
+    # Run the Flask development server on port 5002.
+    # In production, serve the app with gunicorn (see gunicorn.conf.py).
     app.run(host="0.0.0.0", port=5002, debug=True)
@@ -0,0 +1,28 @@
+"""
+Gunicorn configuration for running the Masterblog API in production.
+
+Run from the backend directory (posts.json is resolved relative to it):
+
+    gunicorn backend_app:app
+
+Requires gunicorn 25 or later with the gevent and fast extras
+(see requirements.txt).
+"""
+
+bind = "0.0.0.0:5002"
+
+# The posts live in the memory of the process that serves them, so the
+# app must run in a single worker process. Concurrency comes from the
+# gevent worker, which serves many connections on cooperative greenlets.
+workers = 1
+worker_class = "gevent"
+worker_connections = 1000
+
+# Keep client connections open between requests.
+keepalive = 5
+
+# Parse requests with the gunicorn_h1c C extension instead of the
+# pure Python parser. gunicorn only checks for the extension when it
+# parses a request, so without it the server still starts but fails
+# every request.
+http_parser = "fast"